@@ -1,14 +1,27 @@
-import random
-import math
+from enum import IntEnum
+import numpy as np
+from model import TREE
+from kernels import choose, update, state_key
+from qtable import QTable
 
-ACTIONS = ["UP", "DOWN", "LEFT", "RIGHT", "EXTINGUISH", "STAY"]
+class Action(IntEnum):
+    UP = 0
+    DOWN = 1
+    LEFT = 2
+    RIGHT = 3
+    EXTINGUISH = 4
+    STAY = 5
+
+ACTIONS = list(Action)
+NUM_ACTIONS = len(ACTIONS)
+DELTAS = ((0, -1), (0, 1), (-1, 0), (1, 0), (0, 0), (0, 0))  # (dx, dy) moved by each action
 
 class FirefighterAgent:
     def __init__(self, x, y, extinguishing_radius=4):
         self.x = x
         self.y = y
         self.extinguishing_radius = extinguishing_radius
-        self.q_table = {}  # Will be replaced with shared Q-table
+        self.q_table = QTable(num_actions=NUM_ACTIONS)  # Will be replaced with shared Q-table
         self.alpha = 0.1   # Learning rate
         self.gamma = 0.9   # Discount factor
         self.epsilon = 0.2 # Exploration rate
@@ -17,93 +30,59 @@ class FirefighterAgent:
 
     def get_state(self, env):
         """Detect fires in all directions within visibility range"""
-        fire_dirs = []
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = self.x + dx, self.y + dy
-                if env.in_bounds(nx, ny) and (nx, ny) in env.fire_cells:
-                    fire_dirs.append((dx, dy))
-        
-        return (self.x // 10, self.y // 10,  # Coarse position
-                tuple(fire_dirs))
+        return state_key(self.x, self.y, env.fire_mask)
 
     def _get_fires_in_radius(self, env):
         """Get all fires within extinguishing radius"""
-        fires = []
-        for dx in range(-self.extinguishing_radius, self.extinguishing_radius + 1):
-            for dy in range(-self.extinguishing_radius, self.extinguishing_radius + 1):
-                distance = math.sqrt(dx**2 + dy**2)
-                if distance > self.extinguishing_radius:
-                    continue
-                nx, ny = self.x + dx, self.y + dy
-                if env.in_bounds(nx, ny) and (nx, ny) in env.fire_cells:
-                    fires.append((nx, ny))
-        return fires
+        return list(env.fires_near(self.x, self.y, self.extinguishing_radius))
 
 
     def choose_action(self, state):
         """Epsilon-greedy action selection"""
-        if random.random() < self.epsilon:
-            return random.choice(ACTIONS)
-        
-        self.q_table.setdefault(state, {a: 0 for a in ACTIONS})
-        return max(self.q_table[state].items(), key=lambda x: x[1])[0]
+        rows = np.array([self.q_table.row(state)])
+        return Action(choose(self.q_table.values, rows, np.array([self.epsilon]))[0])
 
     def update_q(self, state, action, reward, next_state):
         """Q-learning update rule"""
-        self.q_table.setdefault(state, {a: 0 for a in ACTIONS})
-        self.q_table.setdefault(next_state, {a: 0 for a in ACTIONS})
-        
-        old_q = self.q_table[state][action]
-        max_next_q = max(self.q_table[next_state].values())
-        new_q = old_q + self.alpha * (reward + self.gamma * max_next_q - old_q)
-        
-        self.q_table[state][action] = new_q
-        self.last_reward = reward
+        rows, next_rows = np.array([self.q_table.row(state)]), np.array([self.q_table.row(next_state)])
+        update(self.q_table.values, rows, np.array([action]), np.array([reward]), next_rows,
+               np.array([self.alpha]), np.array([self.gamma]))
 
     def adjacent_cells(self, env):
         """Get walkable adjacent cells"""
         neighbors = []
         for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
             nx, ny = self.x + dx, self.y + dy
-            if env.in_bounds(nx, ny) and env.grid[ny][nx] != "T":
+            if env.in_bounds(nx, ny) and env.grid[ny, nx] != TREE:
                 neighbors.append((nx, ny))
         return neighbors
 
-    def step(self, env):
-        state = self.get_state(env)
-        action = self.choose_action(state)
-
-        dx, dy = 0, 0
+    def act(self, env, action):
+        """Apply action to the environment and return its reward"""
+        dx, dy = DELTAS[action]
         reward = -0.1  # Small penalty for existing
 
-        if action == "UP":
-            dy = -1
-        elif action == "DOWN":
-            dy = 1
-        elif action == "LEFT":
-            dx = -1
-        elif action == "RIGHT":
-            dx = 1
-        elif action == "EXTINGUISH":
-            extinguished = False
-            for fx, fy in self._get_fires_in_radius(env):
-                if env.extinguish(fx, fy):
-                    self.extinguished_count += 1
-                    reward += 10  # Base reward
-                    # Bonus for extinguishing multiple fires
-                    reward += 5 * len(self._get_fires_in_radius(env))  
-                    extinguished = True
+        if action == Action.EXTINGUISH:
+            extinguished = sum(env.extinguish(fx, fy) for fx, fy in self._get_fires_in_radius(env))
+            self.extinguished_count += extinguished
+            reward += 10 * extinguished  # Base reward
+            # Bonus for extinguishing multiple fires: each one earns 5 per fire still left in radius
+            reward += 5 * extinguished * (extinguished - 1) // 2
             
             if not extinguished:
                 reward = -2  # Penalty for failed extinguishing attempt
 
         # Movement logic (unchanged)
         new_x, new_y = self.x + dx, self.y + dy
-        if env.in_bounds(new_x, new_y) and env.grid[new_y][new_x] != "T":
+        if env.in_bounds(new_x, new_y) and env.grid[new_y, new_x] != TREE:
             self.x, self.y = new_x, new_y
 
+        self.last_reward = reward
+        return reward
+
+    def step(self, env):
+        state = self.get_state(env)
+        action = self.choose_action(state)
+        reward = self.act(env, action)
         next_state = self.get_state(env)
-        self.update_q(state, action, reward, next_state)
\ No newline at end of file
+        self.update_q(state, action, reward, next_state)
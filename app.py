@@ -1,60 +1,49 @@
 import pygame
+import os
 import sys
 import random
-from model import Environment, GRID_SIZE
-from agents import FirefighterAgent
+import numpy as np
+from model import GRID_SIZE
+from agents import NUM_ACTIONS
+from kernels import pre_compile
+from qtable import SharedQTable
+from simulation import create_simulation, start_workers, stop_workers
 
 # Constants
 CELL_SIZE = 4
+NUM_WORKERS = min(3, (os.cpu_count() or 1) - 1)  # Headless training processes sharing the Q-table
+SIM_STEPS_PER_FRAME = 10  # Simulation steps run between rendered frames
+FPS = 30
 WINDOW_SIZE = GRID_SIZE * CELL_SIZE
-COLORS = {
-    " ": (40, 40, 40),       # Burned areas
-    "F": (255, 80, 80),      # Active fire
-    "A1": (80, 180, 255),    # Agent 1 (Blue)
-    "A2": (80, 180, 255),    # Agent 2 (Orange)
-    "A3": (80, 180, 255),    # Agent 3 (Purple)
-    "T": (50, 120, 50)       # Trees
-}
-
-def create_simulation(load_q=None, tree_density=0.3):
-    """Initialize simulation with shared Q-learning"""
-    env = Environment(tree_density=tree_density)
-    
-    # Shared Q-table for cooperative learning
-    shared_q = {} if load_q is None else load_q
-    
-    # Strategic starting positions
-    agents = [
-        FirefighterAgent(30, 30),
-        FirefighterAgent(GRID_SIZE-30, 30),
-        FirefighterAgent(GRID_SIZE//2, GRID_SIZE-30)
-    ]
-    
-    for i, agent in enumerate(agents):
-        agent.q_table = shared_q
-        env.add_agent(agent)
-    
-    return env, agents
+# Terrain colors indexed by cell code (EMPTY, TREE, FIRE, AGENT)
+PALETTE = np.array([
+    (40, 40, 40),       # Burned areas
+    (50, 120, 50),      # Trees
+    (255, 80, 80),      # Active fire
+    (80, 180, 255),     # Agents
+], dtype=np.uint8)
+AGENT_COLORS = [
+    (80, 180, 255),    # Agent 1 (Blue)
+    (80, 180, 255),    # Agent 2 (Orange)
+    (80, 180, 255),    # Agent 3 (Purple)
+]
 
 def draw_environment(env, agents, screen):
     """Render the grid with optimized drawing"""
-    # Draw terrain
-    for y in range(GRID_SIZE):
-        for x in range(GRID_SIZE):
-            cell = env.grid[y][x]
-            color = COLORS.get(cell, (255,255,255))
-            pygame.draw.rect(screen, color, (x*CELL_SIZE, y*CELL_SIZE, CELL_SIZE, CELL_SIZE))
+    # Draw terrain at grid resolution (surfarray expects (x, y) order) and scale it to the window
+    terrain = pygame.surfarray.make_surface(PALETTE[env.grid.T])
+    pygame.transform.scale(terrain, (WINDOW_SIZE, WINDOW_SIZE), screen)
     
     # Draw agents on top
     for i, agent in enumerate(agents):
-        color = COLORS[f"A{i+1}"]
+        color = AGENT_COLORS[i]
         center_x = agent.x * CELL_SIZE + CELL_SIZE//2
         center_y = agent.y * CELL_SIZE + CELL_SIZE//2
         pygame.draw.circle(screen, color, (center_x, center_y), CELL_SIZE//2)
 
 def draw_stats(env, agents, episode, font, screen):
     """Display real-time metrics"""
-    trees = sum(row.count('T') for row in env.grid)
+    trees = env.trees_remaining
     stats = [
         f"Episode: {episode}",
         f"Fires active: {len(env.fire_cells)}",
@@ -73,8 +62,11 @@ def main():
     clock = pygame.time.Clock()
     font = pygame.font.SysFont('Arial', 16)
     
-    # Initialize
-    env, agents = create_simulation()
+    # Initialize: background workers learn into the same shared Q-table as the rendered episode
+    pre_compile()
+    q_table = SharedQTable(num_actions=NUM_ACTIONS)
+    stop_event, workers = start_workers(q_table, NUM_WORKERS)
+    env, agents = create_simulation(load_q=q_table)
     episode = 1
     running = True
     
@@ -85,25 +77,29 @@ def main():
                 running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:  # Reset manually
-                    env, agents = create_simulation(load_q=agents[0].q_table)
+                    env, agents = create_simulation(load_q=q_table)
                     episode += 1
         
-        # Simulation step
-        env.step()
+        # Simulation steps, decoupled from the render rate
+        for _ in range(SIM_STEPS_PER_FRAME):
+            env.step()
+            
+            # Reset conditions
+            if env.fire_engulfed():
+                print(f"Episode {episode} ended. Restarting...")
+                episode += 1
+                env, agents = create_simulation(load_q=q_table)
         
         # Rendering
         draw_environment(env, agents, screen)
         draw_stats(env, agents, episode, font, screen)
         pygame.display.flip()
         
-        # Reset conditions
-        if env.fire_engulfed():
-            print(f"Episode {episode} ended. Restarting...")
-            episode += 1
-            env, agents = create_simulation(load_q=agents[0].q_table)
-        
-        clock.tick(100)  # Cap at 30 FPS
+        clock.tick(FPS)  # Cap at 30 FPS
 
+    stop_workers(stop_event, workers)
+    q_table.close()
+    q_table.unlink()
     pygame.quit()
     sys.exit()
 
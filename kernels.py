@@ -0,0 +1,76 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional, the kernels below also run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+EMPTY_KEY = -1  # Marks a free slot in a Q-table key array
+NO_ROW = -1     # Row of a state a full Q-table couldn't store; read as all-zero values, never written
+
+# 5x5 visibility window around an agent (centre excluded); bit i of a state's fire mask is _NEI[i]
+_NEI = np.array([(dx, dy) for dx in (-2, -1, 0, 1, 2) for dy in (-2, -1, 0, 1, 2)
+                 if not (dx == 0 and dy == 0)], dtype=np.int64)
+
+@njit(cache=True, fastmath=True)
+def state_key(x, y, fire_mask):
+    """State id: coarse position in the low 8 bits, fire mask of the 5x5 window above them"""
+    height, width = fire_mask.shape
+    fires = 0
+    for i in range(_NEI.shape[0]):
+        nx, ny = x + _NEI[i, 0], y + _NEI[i, 1]
+        if 0 <= nx < width and 0 <= ny < height and fire_mask[ny, nx]:
+            fires |= 1 << i
+    return (x // 10) | ((y // 10) << 4) | (fires << 8)
+
+@njit(cache=True)
+def probe(keys, state):
+    """Slot holding state, or the first free slot of its linear probe sequence"""
+    mask = keys.shape[0] - 1
+    slot = ((state * 0x9E3779B1) >> 16) & mask  # Multiplicative hash, middle bits mix the whole id
+    while keys[slot] != state and keys[slot] != EMPTY_KEY:
+        slot = (slot + 1) & mask
+    return slot
+
+@njit(cache=True, fastmath=True)
+def choose(q_values, rows, epsilon):
+    """Epsilon-greedy action for each rows[i], exploring with probability epsilon[i]"""
+    actions = np.empty(rows.shape[0], dtype=np.int64)
+    for i in range(rows.shape[0]):
+        if np.random.random() < epsilon[i]:
+            actions[i] = np.random.randint(q_values.shape[1])
+        elif rows[i] == NO_ROW:
+            actions[i] = 0  # argmax of all-zero values
+        else:
+            actions[i] = np.argmax(q_values[rows[i]])
+    return actions
+
+@njit(cache=True, fastmath=True)
+def update(q_values, rows, actions, rewards, next_rows, alpha, gamma):
+    """Bellman update of each Q(rows[i], actions[i]) in place, one agent after another"""
+    for i in range(rows.shape[0]):
+        row, action = rows[i], actions[i]
+        if row == NO_ROW:
+            continue
+        max_next_q = 0.0 if next_rows[i] == NO_ROW else q_values[next_rows[i]].max()
+        q_values[row, action] += alpha[i] * (rewards[i] + gamma[i] * max_next_q - q_values[row, action])
+
+@njit(cache=True)
+def seed(value):
+    """Seed the generator choose explores with (under numba it is separate from NumPy's)"""
+    np.random.seed(value)
+
+def pre_compile():
+    """Compile the kernels up front so the first simulation step isn't slow"""
+    keys = np.full(8, EMPTY_KEY, dtype=np.int64)
+    q_values = np.zeros((8, 2), dtype=np.float32)
+    state_key(0, 0, np.zeros((5, 5), dtype=bool))
+    probe(keys, 0)
+    rows = np.zeros(1, dtype=np.int64)
+    params = np.zeros(1)
+    choose(q_values, rows, params)
+    update(q_values, rows, rows, params, rows, params, params)
+    seed(0)
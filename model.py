@@ -1,8 +1,48 @@
-import random
-import math
+import numpy as np
+from kernels import choose, update
 
 GRID_SIZE = 150
 
+# Cell codes stored in Environment.grid
+EMPTY, TREE, FIRE, AGENT = 0, 1, 2, 3
+
+# Circular neighborhoods, built once per radius
+_RADIUS_OFFSETS = {}  # radius -> (dx, dy) offsets with dx*dx + dy*dy <= r*r
+_RADIUS_KERNELS = {}  # radius -> same offsets as a (2r+1, 2r+1) bool mask indexed [dy + r, dx + r]
+
+def radius_offsets(r):
+    """(dx, dy) offsets within a circle of radius r, centre included"""
+    offsets = _RADIUS_OFFSETS.get(r)
+    if offsets is None:
+        offsets = _RADIUS_OFFSETS[r] = tuple((dx, dy) for dx in range(-r, r+1) for dy in range(-r, r+1)
+                                             if dx*dx + dy*dy <= r*r)
+    return offsets
+
+def radius_kernel(r):
+    """Boolean mask of the cells within a circle of radius r"""
+    kernel = _RADIUS_KERNELS.get(r)
+    if kernel is None:
+        kernel = _RADIUS_KERNELS[r] = np.zeros((2*r + 1, 2*r + 1), dtype=bool)
+        for dx, dy in radius_offsets(r):
+            kernel[dy + r, dx + r] = True
+    return kernel
+
+class FireCells:
+    """Read-only set-like view of an Environment's burning (x, y) cells"""
+    def __init__(self, env):
+        self._env = env
+
+    def __len__(self):
+        return len(self._env.fire_positions()[0])
+
+    def __contains__(self, cell):
+        x, y = cell
+        return self._env.in_bounds(x, y) and bool(self._env.fire_mask[y, x])
+
+    def __iter__(self):
+        xs, ys = self._env.fire_positions()
+        return zip(xs.tolist(), ys.tolist())
+
 class Environment:
     def __init__(self, tree_density=0.3, fire_spread_radius=3, spread_delay=30):
         """
@@ -13,7 +53,7 @@ class Environment:
         """
         self.grid_width = GRID_SIZE
         self.grid_height = GRID_SIZE
-        self.grid = [[" " for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        self.grid = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.uint8)
         
         # Fire spread parameters
         self.fire_spread_radius = max(1, min(fire_spread_radius, 5))  # Clamped 1-5
@@ -22,73 +62,73 @@ class Environment:
         
         # Generate environment
         self._place_spaced_trees(tree_density)
-        self.fire_cells = set()
+        self.fire_mask = np.zeros((GRID_SIZE, GRID_SIZE), dtype=bool)
+        self._fire_xy = None  # Cached fire_positions(), reset whenever fire_mask changes
         self.agents = []
         self._start_fires(num_fires=5)
 
     def _place_spaced_trees(self, density):
         """Place trees ensuring no two touch (3x3 area check)"""
-        positions = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE)]
-        random.shuffle(positions)
+        # Cells still free of any tree in their 3x3 neighborhood
+        available = np.ones((GRID_SIZE, GRID_SIZE), dtype=bool)
         
         trees_placed = 0
         target_trees = int(GRID_SIZE * GRID_SIZE * density)
+        batch = 256  # Candidates drawn per pass over the availability mask
         
-        for x, y in positions:
-            if trees_placed >= target_trees:
+        while trees_placed < target_trees:
+            ys, xs = np.nonzero(available)
+            if not len(xs):
                 break
-                
-            # Check 3x3 neighborhood
-            can_place = True
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE:
-                        if self.grid[ny][nx] == "T":
-                            can_place = False
-                            break
-                if not can_place:
-                    break
             
-            if can_place:
-                self.grid[y][x] = "T"
-                trees_placed += 1
+            idx = np.random.randint(len(xs), size=min(batch, target_trees - trees_placed))
+            for x, y in zip(xs[idx].tolist(), ys[idx].tolist()):
+                # Earlier picks in this batch may have claimed the neighborhood
+                if available[y, x]:
+                    self.grid[y, x] = TREE
+                    available[max(0, y-1):y+2, max(0, x-1):x+2] = False
+                    trees_placed += 1
+        
+        self.trees_remaining = trees_placed
 
     def _start_fires(self, num_fires):
         """Ignite random trees, ensuring they're spaced apart"""
-        tree_locations = [(x, y) for y in range(GRID_SIZE) for x in range(GRID_SIZE) 
-                         if self.grid[y][x] == "T"]
+        tree_xy = np.argwhere(self.grid == TREE)[:, ::-1]  # (x, y) pairs
+        np.random.shuffle(tree_xy)
         
-        # Ensure fires start spaced out
-        selected = []
-        attempts = 0
-        while len(selected) < min(num_fires, len(tree_locations)) and attempts < 100:
-            x, y = random.choice(tree_locations)
-            if all(math.sqrt((x-sx)**2 + (y-sy)**2) > self.fire_spread_radius 
-                  for (sx, sy) in selected):
-                selected.append((x, y))
-                self._ignite_tree(x, y)
-            attempts += 1
+        # Ensure fires start spaced out: each fire claims a bucket of side fire_spread_radius,
+        # and a tree is only taken if its bucket and the 8 around it are unclaimed
+        bucket = self.fire_spread_radius
+        occupied_buckets = set()
+        started = 0
+        for x, y in tree_xy.tolist():
+            if started >= num_fires:
+                break
+            bx, by = x // bucket, y // bucket
+            if any((bx + dx, by + dy) in occupied_buckets for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+                continue
+            occupied_buckets.add((bx, by))
+            self._ignite_tree(x, y)
+            started += 1
 
     def _ignite_tree(self, x, y):
         """Convert a tree to fire"""
-        if self.grid[y][x] == "T":
-            self.grid[y][x] = "F"
-            self.fire_cells.add((x, y))
-
-    def _get_trees_in_radius(self, x, y):
-        """Find all trees within fire spread radius (circular area)"""
-        trees = []
-        for dy in range(-self.fire_spread_radius, self.fire_spread_radius+1):
-            for dx in range(-self.fire_spread_radius, self.fire_spread_radius+1):
-                nx, ny = x + dx, y + dy
-                distance = math.sqrt(dx**2 + dy**2)
-                if (0 <= nx < self.grid_width and 
-                    0 <= ny < self.grid_height and
-                    distance <= self.fire_spread_radius and
-                    self.grid[ny][nx] == "T"):
-                    trees.append((nx, ny))
-        return trees
+        if self.grid[y, x] == TREE:
+            self.grid[y, x] = FIRE
+            self.trees_remaining -= 1
+            self.fire_mask[y, x] = True
+            self._fire_xy = None
+
+    def _get_trees_in_radius(self):
+        """Mask of trees within fire spread radius (circular area) of any fire"""
+        # Dilate the burning cells by the circular kernel, one shifted OR per offset
+        burning = self.fire_mask
+        reached = np.zeros_like(burning)
+        h, w = self.grid_height, self.grid_width
+        for dx, dy in radius_offsets(self.fire_spread_radius):
+            reached[max(0, dy):h + min(0, dy), max(0, dx):w + min(0, dx)] |= \
+                burning[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)]
+        return reached & (self.grid == TREE)
 
     def step(self):
         """Progress simulation by one step"""
@@ -96,69 +136,105 @@ class Environment:
         
         # 1. Handle agent movements/actions
         for agent in self.agents:
-            if self.grid[agent.y][agent.x] == "A":
-                self.grid[agent.y][agent.x] = " "
+            if self.grid[agent.y, agent.x] == AGENT:
+                self.grid[agent.y, agent.x] = EMPTY
     
-    # Let each agent take their turn
-        for agent in self.agents:
-            agent.step(self)
+    # Let all agents take their turn together
+        if self.agents:
+            self._agent_step_batch()
         
         # Update all agents' new positions
         for agent in self.agents:
-            if self.in_bounds(agent.x, agent.y) and self.grid[agent.y][agent.x] == " ":
-                self.grid[agent.y][agent.x] = "A"
+            if self.in_bounds(agent.x, agent.y) and self.grid[agent.y, agent.x] == EMPTY:
+                self.grid[agent.y, agent.x] = AGENT
 
         # 2. Spread fire only when timer reaches delay
         if self.spread_timer >= self.spread_delay:
             self.spread_timer = 0
-            new_fires = set()
-            
-            for x, y in self.fire_cells:
-                for nx, ny in self._get_trees_in_radius(x, y):
-                    new_fires.add((nx, ny))
-            
-            for x, y in new_fires:
-                self._ignite_tree(x, y)
+            new_fires = self._get_trees_in_radius()
+            self.grid[new_fires] = FIRE
+            self.fire_mask |= new_fires
+            self.trees_remaining -= int(np.count_nonzero(new_fires))
+            self._fire_xy = None
+
+    def _agent_step_batch(self):
+        """Choose and learn for all agents at once; actions still mutate the environment one by one"""
+        agents = self.agents
+        epsilon = np.array([agent.epsilon for agent in agents])
+        alpha = np.array([agent.alpha for agent in agents])
+        gamma = np.array([agent.gamma for agent in agents])
+        
+        # Batch per Q-table, so agents with their own tables keep learning into them
+        groups = {}  # id(q_table) -> indices of the agents using it
+        for i, agent in enumerate(agents):
+            groups.setdefault(id(agent.q_table), []).append(i)
+        groups = [(agents[idx[0]].q_table, np.array(idx)) for idx in groups.values()]
+        
+        actions = np.empty(len(agents), dtype=np.int64)
+        rows = []
+        for q_table, idx in groups:
+            rows.append(np.array([q_table.row(agents[i].get_state(self)) for i in idx]))
+            # Read values after row(), which may grow a local table
+            actions[idx] = choose(q_table.values, rows[-1], epsilon[idx])
+        
+        rewards = np.array([agent.act(self, action) for agent, action in zip(agents, actions.tolist())])
+        
+        for (q_table, idx), group_rows in zip(groups, rows):
+            next_rows = np.array([q_table.row(agents[i].get_state(self)) for i in idx])
+            update(q_table.values, group_rows, actions[idx], rewards[idx], next_rows, alpha[idx], gamma[idx])
 
     # Utility methods
     def add_agent(self, agent):
         """Add an agent to the environment"""
-        if self.grid[agent.y][agent.x] == " ":  # Ensure starting position is empty
+        if self.grid[agent.y, agent.x] == EMPTY:  # Ensure starting position is empty
             self.agents.append(agent)
-            self.grid[agent.y][agent.x] = "A"
+            self.grid[agent.y, agent.x] = AGENT
         else:
             # Find nearest empty spot if default position is occupied
             for radius in range(1, 10):
                 for dx in range(-radius, radius+1):
                     for dy in range(-radius, radius+1):
                         nx, ny = agent.x + dx, agent.y + dy
-                        if self.in_bounds(nx, ny) and self.grid[ny][nx] == " ":
+                        if self.in_bounds(nx, ny) and self.grid[ny, nx] == EMPTY:
                             agent.x, agent.y = nx, ny
                             self.agents.append(agent)
-                            self.grid[ny][nx] = "A"
+                            self.grid[ny, nx] = AGENT
                             return
 
     def in_bounds(self, x, y):
         """Check if coordinates are within grid"""
         return 0 <= x < self.grid_width and 0 <= y < self.grid_height
 
+    @property
+    def fire_cells(self):
+        """Burning cells as a set-like view over fire_mask"""
+        return FireCells(self)
+
+    def fire_positions(self):
+        """Parallel int16 arrays (xs, ys) of burning cells"""
+        if self._fire_xy is None:
+            ys, xs = np.nonzero(self.fire_mask)
+            self._fire_xy = xs.astype(np.int16), ys.astype(np.int16)
+        return self._fire_xy
+
+    def fires_near(self, x, y, r):
+        """Iterate fires within radius r (circular area) of (x, y)"""
+        x0, y0 = max(0, x - r), max(0, y - r)
+        window = self.fire_mask[y0:y + r + 1, x0:x + r + 1]
+        ky, kx = y0 - (y - r), x0 - (x - r)  # Kernel rows/columns clipped off the grid edge
+        window = window & radius_kernel(r)[ky:ky + window.shape[0], kx:kx + window.shape[1]]
+        ys, xs = np.nonzero(window)
+        return zip((xs + x0).tolist(), (ys + y0).tolist())
+
     def extinguish(self, x, y):
         """Extinguish fire and return True if successful"""
-        if (x, y) in self.fire_cells:
-            self.grid[y][x] = " "  # Convert to empty space
-            self.fire_cells.remove((x, y))
+        if self.in_bounds(x, y) and self.fire_mask[y, x]:
+            self.grid[y, x] = EMPTY  # Convert to empty space
+            self.fire_mask[y, x] = False
+            self._fire_xy = None
             return True
         return False
 
     def fire_engulfed(self):
         """Check if fire has taken over too much of the grid"""
-        trees_remaining = 0
-        threshold = self.grid_width * self.grid_height * 0.02  # 10%
-        
-        # Fast row-by-row count with early exit
-        for row in self.grid:
-            trees_remaining += row.count('T')
-            if trees_remaining >= threshold:
-                return False
-        
-        return True
\ No newline at end of file
+        return self.trees_remaining < self.grid_width * self.grid_height * 0.02  # 2%
\ No newline at end of file
@@ -0,0 +1,93 @@
+from multiprocessing import Value
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from kernels import EMPTY_KEY, NO_ROW, probe
+
+MAX_STATES = 1 << 20  # Rows in the shared table, must be a power of two
+
+class QTable:
+    """
+    Process-local Q-table with the same row()/values interface as SharedQTable.
+    Rows are handed out in visit order and values doubles whenever it fills up,
+    so re-read values after looking up new rows.
+    """
+    def __init__(self, num_actions=6, capacity=1024):
+        self.num_actions = num_actions
+        self._rows = {}  # state id -> row index in values
+        self.values = np.zeros((capacity, num_actions), dtype=np.float32)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, state):
+        """Row index of state in values, inserted with zeroed action values on first visit"""
+        row = self._rows.get(state)
+        if row is None:
+            row = self._rows[state] = len(self._rows)
+            if row == len(self.values):
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+        return row
+
+class SharedQTable:
+    """
+    Fixed-size Q-table in shared memory, so several processes can learn into it:
+    - keys: int64 state ids, open-addressed with linear probing
+    - values: float32 action values, one row per key slot
+    Lookups don't lock; inserting a new state takes a lock shared by all processes.
+    Value updates are lock-free (concurrent writes to one row may lose an update).
+    Once 90% of max_states are taken, new states stop being learned: row() returns
+    NO_ROW for them, which the kernels read as all-zero values and never update.
+    """
+    def __init__(self, max_states=MAX_STATES, num_actions=6):
+        if max_states <= 0 or max_states & (max_states - 1):
+            raise ValueError(f"max_states must be a power of two, got {max_states}")
+        self.max_states = max_states
+        self.num_actions = num_actions
+        self._shm = SharedMemory(create=True, size=max_states * (8 + 4 * num_actions))
+        self._size = Value('q', 0)  # Its lock also serialises inserts
+        self._attach()
+        self.keys[:] = EMPTY_KEY
+        self.values[:] = 0
+
+    def _attach(self):
+        self.keys = np.ndarray((self.max_states,), dtype=np.int64, buffer=self._shm.buf)
+        self.values = np.ndarray((self.max_states, self.num_actions), dtype=np.float32,
+                                 buffer=self._shm.buf, offset=8 * self.max_states)
+
+    def __getstate__(self):
+        # Worker processes re-attach to the same block by name
+        return {"max_states": self.max_states, "num_actions": self.num_actions,
+                "name": self._shm.name, "size": self._size}
+
+    def __setstate__(self, state):
+        self.max_states = state["max_states"]
+        self.num_actions = state["num_actions"]
+        self._shm = SharedMemory(name=state["name"])
+        self._size = state["size"]
+        self._attach()
+
+    def __len__(self):
+        return self._size.value
+
+    def row(self, state):
+        """Row index of state in values, inserted with zeroed action values on first visit"""
+        slot = probe(self.keys, state)
+        if self.keys[slot] != state:
+            with self._size.get_lock():
+                # Another process may have inserted it (or taken the slot) since we looked
+                slot = probe(self.keys, state)
+                if self.keys[slot] != state:
+                    if self._size.value >= self.max_states * 0.9:
+                        return NO_ROW  # Table is full, don't learn this state
+                    self.keys[slot] = state
+                    self._size.value += 1
+        return slot
+
+    def close(self):
+        """Detach this process from the shared block"""
+        del self.keys, self.values
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared block, call once from the process that created it"""
+        self._shm.unlink()
@@ -0,0 +1,55 @@
+import multiprocessing
+import numpy as np
+from model import Environment, GRID_SIZE
+from agents import FirefighterAgent, NUM_ACTIONS
+from kernels import pre_compile, seed
+from qtable import QTable
+
+def create_simulation(load_q=None, tree_density=0.3):
+    """Initialize simulation with shared Q-learning"""
+    env = Environment(tree_density=tree_density)
+
+    # Q-table shared by the agents for cooperative learning (pass a SharedQTable to share across processes)
+    shared_q = QTable(num_actions=NUM_ACTIONS) if load_q is None else load_q
+
+    # Strategic starting positions
+    agents = [
+        FirefighterAgent(30, 30),
+        FirefighterAgent(GRID_SIZE-30, 30),
+        FirefighterAgent(GRID_SIZE//2, GRID_SIZE-30)
+    ]
+
+    for i, agent in enumerate(agents):
+        agent.q_table = shared_q
+        env.add_agent(agent)
+
+    return env, agents
+
+def train_worker(q_table, stop_event, worker_seed):
+    """Run headless episodes, learning into the shared Q-table until stop_event is set"""
+    # Forked workers inherit the parent's RNG states, so give each its own stream
+    np.random.seed(worker_seed)
+    seed(worker_seed)
+    pre_compile()
+
+    env, agents = create_simulation(load_q=q_table)
+    while not stop_event.is_set():
+        env.step()
+        if env.fire_engulfed():
+            env, agents = create_simulation(load_q=q_table)
+    q_table.close()
+
+def start_workers(q_table, num_workers):
+    """Launch background training processes; returns (stop_event, processes)"""
+    stop_event = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=train_worker, args=(q_table, stop_event, i + 1), daemon=True)
+               for i in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    return stop_event, workers
+
+def stop_workers(stop_event, workers):
+    """Signal training processes to finish and wait for them"""
+    stop_event.set()
+    for worker in workers:
+        worker.join()